@@ -1,8 +1,14 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
+import csv
+import io
 import json
 import os
+import ahocorasick
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 
 # Configure the Streamlit page (title, icon, layout)
 st.set_page_config(
@@ -14,15 +20,26 @@ st.set_page_config(
 # File used to persist category rules between sessions
 category_file = "categories.json"
 
-# Initialize category dictionary in session state
-# This will hold category names and their associated keyword lists
+# Month abbreviations used in statement dates ("DD MMM YYYY") -> month number
+month_numbers = {
+    "Jan": "01", "Feb": "02", "Mar": "03", "Apr": "04",
+    "May": "05", "Jun": "06", "Jul": "07", "Aug": "08",
+    "Sep": "09", "Oct": "10", "Nov": "11", "Dec": "12"
+}
+
+# Initialize category dictionary in session state once per session
+# This will hold category names and their associated keyword sets
 if "categories" not in st.session_state:
-    st.session_state.categories = {"Uncategorized": []}
+    st.session_state.categories = {"Uncategorized": set()}
 
-# Load saved category configuration from disk, if it exists
-if os.path.exists(category_file):
-    with open(category_file, "r") as f:
-        st.session_state.categories = json.load(f)
+    # Load saved category configuration from disk, if it exists
+    # Keywords are stored as lists in JSON and kept as sets in memory
+    if os.path.exists(category_file):
+        with open(category_file, "r") as f:
+            st.session_state.categories = {
+                category: set(keywords)
+                for category, keywords in json.load(f).items()
+            }
 
 
 def save_categories():
@@ -31,65 +48,173 @@ def save_categories():
     This allows category rules to be reused across app sessions.
     """
     with open(category_file, "w") as f:
-        json.dump(st.session_state.categories, f)
+        json.dump(
+            {
+                category: sorted(keywords)
+                for category, keywords in st.session_state.categories.items()
+            },
+            f
+        )
 
 
 def categorize_transactions(df: pd.DataFrame) -> pd.DataFrame:
     """
     Assign a category to each transaction based on user-defined keyword rules.
 
-    The function looks at the 'Details' field and checks if it matches
+    The function looks at the 'Details' field and checks if it contains
     any of the stored keywords for each category. If a match is found,
     the transaction is assigned to that category; otherwise it defaults
-    to 'Uncategorized'.
+    to 'Uncategorized'. When several keywords match, an exact match on
+    the whole Details wins, then the longest keyword.
     """
-    df["Category"] = "Uncategorized"
-
-    for category, keywords in st.session_state.categories.items():
-        # Skip the default bucket or categories without any keywords defined
-        if category == "Uncategorized" or not keywords:
+    # The Category column is a categorical over every known category name
+    # so edits to any existing category can be written back in place
+    category_names = list(st.session_state.categories)
+    if "Uncategorized" not in category_names:
+        category_names.insert(0, "Uncategorized")
+    uncategorized_code = category_names.index("Uncategorized")
+
+    # Build a single Aho-Corasick automaton over every normalized keyword,
+    # skipping the default bucket
+    automaton = ahocorasick.Automaton()
+    for code, category in enumerate(category_names):
+        if category == "Uncategorized":
             continue
+        for keyword in st.session_state.categories[category]:
+            normalized_keyword = keyword.lower().strip()
+            if normalized_keyword:
+                automaton.add_word(
+                    normalized_keyword, (code, len(normalized_keyword)))
+
+    # Nothing to match against; everything stays in the default bucket
+    if len(automaton) == 0:
+        codes = np.full(len(df), uncategorized_code)
+    else:
+        automaton.make_automaton()
+
+        def match_category_code(details):
+            # A keyword equal to the whole Details (e.g. one taught through
+            # Apply Changes) always wins
+            exact = automaton.get(details, None)
+            if exact is not None:
+                return exact[0]
+
+            # Otherwise prefer the longest keyword found anywhere in it, so
+            # "uber eats" beats a shorter "uber" from another category
+            best_code, best_length = uncategorized_code, 0
+            for _, (code, length) in automaton.iter(details):
+                if length > best_length:
+                    best_code, best_length = code, length
+            return best_code
+
+        # Statements repeat the same merchants many times, so factorize the
+        # keys and only scan each distinct Details string once
+        detail_codes, unique_details = pd.factorize(df["_details_key"])
+        unique_category_codes = np.fromiter(
+            map(match_category_code, unique_details),
+            dtype=np.int64,
+            count=len(unique_details)
+        )
 
-        lowered_keywords = [keyword.lower().strip() for keyword in keywords]
+        # Broadcast back to every row with a single integer gather
+        codes = unique_category_codes[detail_codes]
 
-        # Match each row's Details against the keyword list for this category
-        for idx, row in df.iterrows():
-            details = str(row["Details"]).lower().strip()
-            # Currently uses exact string matches; could be extended to "contains" logic
-            if details in lowered_keywords:
-                df.at[idx, "Category"] = category
+    # Assign the whole column once from the precomputed codes
+    df["Category"] = pd.Categorical.from_codes(codes, categories=category_names)
 
     return df
 
 
-def load_transactions(file):
+def clean_transactions(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Read, clean, and prepare the uploaded CSV file for analysis.
+    Clean one chunk of raw CSV rows.
 
     Steps:
-    - Read the CSV into a DataFrame
     - Standardize column names
     - Convert the Amount column to numeric
     - Parse the Date column to datetime
+    - Add a normalized Details key for matching and grouping
     - Drop rows with invalid dates
-    - Apply transaction categorization rules
     """
-    try:
-        df = pd.read_csv(file)
-        df.columns = [col.strip() for col in df.columns]
+    df.columns = [col.strip() for col in df.columns]
+
+    # Remove thousands separators and convert Amount to float, working on
+    # the Arrow string column directly instead of round-tripping via str.
+    # Columns that already arrive numeric only need the cast
+    amount = df["Amount"]
+    if pd.api.types.is_string_dtype(amount):
+        amount = amount.str.replace(",", "", regex=False)
+    df["Amount"] = amount.astype("float64")
+
+    # Convert Date column ("DD MMM YYYY") to datetime by rebuilding it as
+    # ISO "YYYY-MM-DD" strings, then drop rows where parsing fails
+    parts = (
+        df["Date"].astype(str).str.strip()
+        .str.split(n=2, expand=True)
+        .reindex(columns=range(3)).astype("string")
+    )
+    month = parts[1].str.title().map(month_numbers)
+    iso_dates = parts[2] + "-" + month + "-" + parts[0].str.zfill(2)
+    df["Date"] = pd.to_datetime(iso_dates, format="%Y-%m-%d", errors="coerce")
+
+    # Lowercased, stripped Details, computed once and reused both for
+    # keyword matching and for grouping merchants
+    df["_details_key"] = df["Details"].fillna("").str.lower().str.strip()
+    return df.dropna(subset=["Date"])
 
-        # Remove thousands separators and convert Amount to float
-        df["Amount"] = (
-            df["Amount"].astype(str).str.replace(
-                ",", "", regex=False).astype(float)
-        )
 
-        # Convert Date column to datetime and drop rows where parsing fails
-        df["Date"] = pd.to_datetime(
-            df["Date"], format="%d %b %Y", errors="coerce"
+@st.cache_data(show_spinner=False, max_entries=8)
+def parse_transactions(file_bytes: bytes) -> pd.DataFrame:
+    """
+    Read and clean the raw CSV contents into a DataFrame.
+
+    Cached on the file bytes so Streamlit reruns reuse the parsed data
+    instead of re-reading the CSV on every widget interaction. The CSV
+    is streamed through pyarrow's CSV reader in blocks and each block is
+    cleaned before the next one is parsed, which keeps peak memory down
+    on large statements.
+    """
+    # The streaming reader infers types from the first block only, so read
+    # the raw header names and pin every column to text. That way every
+    # block gets the same schema whatever its rows look like, and empty
+    # cells come through as nulls rather than empty strings
+    header_line = file_bytes.split(b"\n", 1)[0].decode("utf-8-sig")
+    column_names = next(csv.reader([header_line.rstrip("\r")]), [])
+
+    reader = pa_csv.open_csv(
+        io.BytesIO(file_bytes),
+        read_options=pa_csv.ReadOptions(block_size=4 << 20),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in column_names},
+            strings_can_be_null=True
         )
-        df = df.dropna(subset=["Date"])
+    )
+    chunks = [
+        clean_transactions(batch.to_pandas(types_mapper=pd.ArrowDtype))
+        for batch in reader
+    ]
+
+    # A header-only file yields no blocks; keep its columns all the same
+    if not chunks:
+        chunks = [clean_transactions(
+            reader.schema.empty_table().to_pandas(types_mapper=pd.ArrowDtype)
+        )]
+    df = pd.concat(chunks, ignore_index=True)
+
+    # Debit/Credit only ever holds a couple of distinct labels
+    df["Debit/Credit"] = df["Debit/Credit"].astype("category")
+    return df
+
 
+def load_transactions(file):
+    """
+    Read, clean, and prepare the uploaded CSV file for analysis.
+
+    Parsing is delegated to the cached parse_transactions; categorization
+    runs on every call since it depends on the current category rules.
+    """
+    try:
+        df = parse_transactions(file.getvalue())
         return categorize_transactions(df)
 
     except Exception as e:
@@ -98,20 +223,188 @@ def load_transactions(file):
         return None
 
 
-def add_keyword_to_category(category, keyword):
+def add_keywords_bulk(pairs):
     """
-    Add a new keyword to a given category and persist the update.
+    Add several (category, keyword) pairs and persist them in one write.
 
     This function supports the "teach the system" workflow:
     when a user assigns a category to a transaction, its Details
     can be stored as a keyword for automatic future categorization.
+    The category file is rewritten once per click rather than once
+    per changed row.
     """
-    keyword = keyword.strip()
-    if keyword and keyword not in st.session_state.categories[category]:
-        st.session_state.categories[category].append(keyword)
+    changed = False
+    for category, keyword in pairs:
+        keyword = keyword.strip()
+        if keyword and keyword not in st.session_state.categories[category]:
+            st.session_state.categories[category].add(keyword)
+            changed = True
+
+    if changed:
         save_categories()
-        return True
-    return False
+    return changed
+
+
+def dataframe_key(df: pd.DataFrame) -> int:
+    """
+    Compute a content hash of a DataFrame for use as a cache key.
+
+    Streamlit samples large DataFrames when hashing cache arguments,
+    so the aggregation caches below are keyed on this full hash instead.
+    Only the columns those aggregations read are hashed.
+    """
+    summary_columns = [
+        col for col in ("Date", "Amount", "Category", "_details_key", "Details")
+        if col in df.columns
+    ]
+    return int(
+        pd.util.hash_pandas_object(df[summary_columns], index=False).sum()
+    )
+
+
+def summarize_categories(monthly_cat: pd.DataFrame) -> pd.DataFrame:
+    """
+    Total expenses per category, largest first.
+
+    Derived from the monthly category totals rather than the full
+    expenses table, so the large frame is only scanned once for both.
+    """
+    return (
+        monthly_cat.groupby("Category", observed=True, sort=False)["Amount"]
+        .sum()
+        .reset_index()
+        .sort_values("Amount", ascending=False)
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def summarize_merchants(
+    df_key: int, _debits_df: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Total expenses per merchant, limited to the top 10.
+
+    Merchants are grouped on the normalized Details key and shown
+    with the first original Details value seen for each.
+    """
+    top_totals = (
+        _debits_df.groupby("_details_key", observed=True, sort=False)["Amount"]
+        .sum()
+        .sort_values(ascending=False)
+        .head(10)
+    )
+
+    # Look up a display name only for the ten keys that made the cut
+    top_rows = _debits_df.loc[
+        _debits_df["_details_key"].isin(top_totals.index),
+        ["_details_key", "Details"]
+    ].drop_duplicates("_details_key")
+    details = top_rows.set_index("_details_key")["Details"]
+
+    return pd.DataFrame({
+        "Details": details.reindex(top_totals.index).to_numpy(),
+        "Amount": top_totals.to_numpy()
+    })
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def summarize_daily(df_key: int, _df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Total amount per date, in date order.
+    """
+    return (
+        _df.groupby("Date", observed=True, sort=False)["Amount"]
+        .sum()
+        .reset_index()
+        .sort_values("Date")
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def summarize_monthly_categories(
+    df_key: int, _debits_df: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Total expenses per month and category, in month order.
+    """
+    # Truncate dates to the month as a plain datetime64 cast rather than
+    # building a Period and a string for every row
+    month_bucket = pd.Series(
+        _debits_df["Date"].to_numpy().astype("datetime64[M]"),
+        index=_debits_df.index,
+        name="YearMonth"
+    )
+    monthly_cat = (
+        _debits_df
+        .groupby([month_bucket, "Category"], observed=True)["Amount"]
+        .sum()
+        .reset_index()
+    )
+
+    # Only the small aggregated result is formatted for display
+    monthly_cat["YearMonth"] = monthly_cat["YearMonth"].dt.strftime("%Y-%m")
+    return monthly_cat
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_category_pie(category_totals: pd.DataFrame):
+    """
+    Pie chart showing distribution of expenses across categories.
+
+    The chart builders below are cached on their (small) aggregated
+    input, so figures are only rebuilt when the underlying totals change.
+    """
+    return px.pie(
+        category_totals,
+        values="Amount",
+        names="Category",
+        title="Expenses by Category"
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_merchants_bar(top_merchants: pd.DataFrame):
+    """
+    Bar chart showing top merchants by total spend.
+    """
+    fig = px.bar(
+        top_merchants,
+        x="Details",
+        y="Amount",
+        title="Top 10 Expense Merchants",
+    )
+    fig.update_layout(xaxis_tickangle=-45)
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_daily_line(daily_totals: pd.DataFrame, title: str):
+    """
+    Line chart of amounts over time, aggregated by date.
+    """
+    return px.line(
+        daily_totals,
+        x="Date",
+        y="Amount",
+        title=title
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_monthly_bar(monthly_cat: pd.DataFrame):
+    """
+    Stacked bar chart of monthly expenses by category.
+    """
+    fig = px.bar(
+        monthly_cat,
+        x="YearMonth",
+        y="Amount",
+        color="Category",
+        title="Expenses by Category Every Month:",
+        barmode="stack"
+    )
+    fig.update_layout(xaxis_title="Month")
+    return fig
 
 
 def main():
@@ -143,12 +436,16 @@ def main():
         return
 
     # Split the data into expenses (Debits) and payments/income (Credits)
-    debits_df = df[df["Debit/Credit"] == "Debit"].copy()
-    credits_df = df[df["Debit/Credit"] == "Credit"].copy()
-
-    # Store DataFrames in session state so they remain accessible after edits
-    st.session_state.debits_df = debits_df.copy()
-    st.session_state.credits_df = credits_df.copy()
+    # and store them in session state so they remain accessible after edits.
+    # Debit/Credit is categorical, so each comparison is a code comparison
+    st.session_state.debits_df = (
+        df.loc[df["Debit/Credit"] == "Debit"].reset_index(drop=True)
+    )
+    st.session_state.credits_df = (
+        df.loc[df["Debit/Credit"] == "Credit"].reset_index(drop=True)
+    )
+    debits_df = st.session_state.debits_df
+    credits_df = st.session_state.credits_df
 
     # Calculate headline financial metrics
     total_debits = debits_df["Amount"].sum()
@@ -167,11 +464,18 @@ def main():
 
     st.markdown("---")
 
-    # Create two tabs: one focused on expenses, one on payments
-    tab1, tab2 = st.tabs(["💸 Expenses (Debit)", "💳 Payments (Credit)"])
+    # Switch between two views: one focused on expenses, one on payments.
+    # Unlike st.tabs, only the selected view's body runs on each rerun
+    view = st.radio(
+        "View",
+        ["💸 Expenses (Debit)", "💳 Payments (Credit)"],
+        horizontal=True,
+        label_visibility="collapsed",
+        key="active_view"
+    )
 
-    # Expenses tab: category management, transaction editing, and expense analytics
-    with tab1:
+    # Expenses view: category management, transaction editing, and expense analytics
+    if view == "💸 Expenses (Debit)":
         st.subheader("Categories and Rules")
 
         col_cat1, col_cat2 = st.columns([2, 3])
@@ -183,7 +487,7 @@ def main():
 
             if add_button and new_category:
                 if new_category not in st.session_state.categories:
-                    st.session_state.categories[new_category] = []
+                    st.session_state.categories[new_category] = set()
                     save_categories()
                     # Rerun to refresh dropdowns and state after adding a new category
                     st.rerun()
@@ -210,25 +514,30 @@ def main():
         # Apply user edits and update category rules based on their changes
         save_button = st.button("Apply Changes", type="primary")
         if save_button:
-            for idx, row in edited_df.iterrows():
-                new_category_value = row["Category"]
-                if new_category_value == st.session_state.debits_df.at[idx, "Category"]:
-                    continue
+            # Find the rows whose category was edited in a single comparison
+            changed = (
+                edited_df["Category"].to_numpy()
+                != st.session_state.debits_df["Category"].to_numpy()
+            )
+            st.session_state.debits_df.loc[changed, "Category"] = (
+                edited_df.loc[changed, "Category"].to_numpy()
+            )
 
-                details = row["Details"]
-                st.session_state.debits_df.at[idx,
-                                              "Category"] = new_category_value
-                add_keyword_to_category(new_category_value, details)
+            add_keywords_bulk(zip(
+                edited_df.loc[changed, "Category"],
+                edited_df.loc[changed, "Details"]
+            ))
 
         # Refresh the local debits DataFrame after applying changes
-        debits_df = st.session_state.debits_df.copy()
+        debits_df = st.session_state.debits_df
+        debits_key = dataframe_key(debits_df)
+
+        # Aggregate expenses by month and category in a single pass,
+        # then roll that up into per-category totals
+        monthly_cat = summarize_monthly_categories(debits_key, debits_df)
+        category_totals = summarize_categories(monthly_cat)
 
-        # Aggregate expenses by category
         st.subheader("Expense Summary by Category")
-        category_totals = debits_df.groupby(
-            "Category")["Amount"].sum().reset_index()
-        category_totals = category_totals.sort_values(
-            "Amount", ascending=False)
 
         st.dataframe(
             category_totals,
@@ -243,71 +552,29 @@ def main():
 
         # Pie chart showing distribution of expenses across categories
         with col_pie:
-            fig_pie = px.pie(
-                category_totals,
-                values="Amount",
-                names="Category",
-                title="Expenses by Category"
-            )
+            fig_pie = build_category_pie(category_totals)
             st.plotly_chart(fig_pie, use_container_width=True)
 
         # Bar chart showing top merchants by total spend
         with col_bar:
-            top_merchants = (
-                debits_df.groupby("Details")["Amount"]
-                .sum()
-                .reset_index()
-                .sort_values("Amount", ascending=False)
-                .head(10)
-            )
-            fig_merchants = px.bar(
-                top_merchants,
-                x="Details",
-                y="Amount",
-                title="Top 10 Expense Merchants",
-            )
-            fig_merchants.update_layout(xaxis_tickangle=-45)
+            top_merchants = summarize_merchants(debits_key, debits_df)
+            fig_merchants = build_merchants_bar(top_merchants)
             st.plotly_chart(fig_merchants, use_container_width=True)
 
         # Line chart of expenses over time, aggregated by date
         st.subheader("Monthly Expenses Over Time")
-        daily_spend = (
-            debits_df.groupby("Date")["Amount"]
-            .sum()
-            .reset_index()
-            .sort_values("Date")
-        )
-        fig_time = px.line(
-            daily_spend,
-            x="Date",
-            y="Amount",
-            title="Monthly Daily Total Expenses:"
-        )
+        daily_spend = summarize_daily(debits_key, debits_df)
+        fig_time = build_daily_line(
+            daily_spend, "Monthly Daily Total Expenses:")
         st.plotly_chart(fig_time, use_container_width=True)
 
         # Stacked bar chart of monthly expenses by category
         st.subheader("Monthly Expenses by Category")
-        debits_df["YearMonth"] = debits_df["Date"].dt.to_period(
-            "M").astype(str)
-        monthly_cat = (
-            debits_df
-            .groupby(["YearMonth", "Category"])["Amount"]
-            .sum()
-            .reset_index()
-        )
-        fig_monthly = px.bar(
-            monthly_cat,
-            x="YearMonth",
-            y="Amount",
-            color="Category",
-            title="Expenses by Category Every Month:",
-            barmode="stack"
-        )
-        fig_monthly.update_layout(xaxis_title="Month")
+        fig_monthly = build_monthly_bar(monthly_cat)
         st.plotly_chart(fig_monthly, use_container_width=True)
 
-    # Payments tab: focus on credits and inflows
-    with tab2:
+    # Payments view: focus on credits and inflows
+    else:
         st.subheader("Payments Summary")
 
         total_payments = credits_df["Amount"].sum()
@@ -326,20 +593,11 @@ def main():
         )
 
         # Line chart of payments over time
-        credits_df = edited_credit_df.copy()
+        credits_df = edited_credit_df
         st.subheader("Payments Over Time")
-        daily_income = (
-            credits_df.groupby("Date")["Amount"]
-            .sum()
-            .reset_index()
-            .sort_values("Date")
-        )
-        fig_income_time = px.line(
-            daily_income,
-            x="Date",
-            y="Amount",
-            title="Monthly Daily Total Payments:"
-        )
+        daily_income = summarize_daily(dataframe_key(credits_df), credits_df)
+        fig_income_time = build_daily_line(
+            daily_income, "Monthly Daily Total Payments:")
         st.plotly_chart(fig_income_time, use_container_width=True)
 
 